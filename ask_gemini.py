@@ -1,8 +1,18 @@
 import os
+import json
+import time
+import hashlib
 import argparse
-import google.generativeai as genai
+import asyncio
 import sys
+import shlex
+import subprocess
+import tempfile
 import dotenv
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
 from pathlib import Path
 
 dotenv.load_dotenv()
@@ -11,50 +21,384 @@ GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 CODEBASE_PATH = os.environ.get("CODEBASE_PATH")
 EXCLUDED_PATHS = os.environ.get("EXCLUDED_PATHS", "").split(",")
 GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash-8b")
+CACHE_DIR = Path(os.environ.get("ASKGEMINI_CACHE_DIR", Path.home() / ".cache" / "askgemini"))
+DEFAULT_SOURCE_EXTS = (
+    ".php,.py,.js,.jsx,.mjs,.ts,.tsx,.java,.kt,.kts,.scala,.c,.cc,.cpp,.h,.hh,.hpp,"
+    ".cs,.rs,.go,.rb,.swift,.m,.lua,.sh,.sql,.html,.css,.toml,.yaml,.yml"
+)
+SOURCE_EXTS = frozenset(
+    f".{ext.strip().lstrip('.').lower()}"
+    for ext in os.environ.get("SOURCE_EXTS", DEFAULT_SOURCE_EXTS).split(",")
+    if ext.strip()
+)
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+CONTEXT_CACHE_RETRY_AFTER = timedelta(days=1)
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
-if GEMINI_API_KEY is None:
-    raise ValueError("GEMINI_API_KEY environment variable not set")
-if CODEBASE_PATH is None:
-    raise ValueError("CODEBASE_PATH environment variable not set")
-codebase_path_obj = Path(CODEBASE_PATH).resolve()
-if not codebase_path_obj.is_dir():
-    raise ValueError(f"CODEBASE_PATH '{CODEBASE_PATH}' is not a valid directory.")
+Settings = namedtuple(
+    "Settings",
+    ["max_file_bytes", "context_cache", "context_cache_min_bytes", "gemini_concurrency", "response_cache_max_age"],
+)
 
-genai.configure(api_key=GEMINI_API_KEY)
+def _int_env(name, default, minimum):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got '{value}'.") from None
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}.")
+    return number
+
+def _bool_env(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.strip().lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be true or false, got '{value}'.")
+
+# Numeric settings are parsed on first use rather than at import, so a bad
+# value is reported after argument parsing instead of breaking --help.
+@lru_cache(maxsize=None)
+def get_settings():
+    return Settings(
+        max_file_bytes=_int_env("MAX_FILE_BYTES", 1_000_000, minimum=0),
+        context_cache=_bool_env("CONTEXT_CACHE", False),
+        context_cache_min_bytes=_int_env("CONTEXT_CACHE_MIN_BYTES", 128_000, minimum=0),
+        gemini_concurrency=_int_env("GEMINI_CONCURRENCY", 4, minimum=1),
+        response_cache_max_age=_int_env("RESPONSE_CACHE_MAX_AGE", 7 * 24 * 60 * 60, minimum=0),
+    )
+
+def _validate_env():
+    if GEMINI_API_KEY is None:
+        raise ValueError("GEMINI_API_KEY environment variable not set")
+    if CODEBASE_PATH is None:
+        raise ValueError("CODEBASE_PATH environment variable not set")
+    codebase_path_obj = Path(CODEBASE_PATH).resolve()
+    if not codebase_path_obj.is_dir():
+        raise ValueError(f"CODEBASE_PATH '{CODEBASE_PATH}' is not a valid directory.")
+    get_settings()
+    return codebase_path_obj
+
+@lru_cache(maxsize=None)
+def _genai():
+    # Importing the SDK pulls in gRPC and protobuf, so it is deferred until a
+    # request is actually made to keep --help and argument errors fast.
+    import google.generativeai as genai
 
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai
+
+def _read_one(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            return f.read()
+    except Exception as e:
+        print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+        return None
+
+def _file_index_path(codebase_root):
+    return CACHE_DIR / "files" / f"{hashlib.sha256(codebase_root.encode('utf-8')).hexdigest()}.json"
+
+def _is_fingerprint(entry):
+    return (
+        isinstance(entry, list)
+        and len(entry) == 3
+        and all(isinstance(value, int) for value in entry[:2])
+        and isinstance(entry[2], str)
+        and len(entry[2]) == 64
+        and all(c in "0123456789abcdef" for c in entry[2])
+    )
+
+def _load_file_index(index_path):
+    try:
+        with index_path.open("r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Warning: Could not read file index {index_path}: {e}", file=sys.stderr)
+        return {}
+    if not isinstance(index, dict):
+        print(f"Warning: Ignoring malformed file index {index_path}", file=sys.stderr)
+        return {}
+    return {path: entry for path, entry in index.items() if _is_fingerprint(entry)}
+
+def _read_many(file_paths):
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        return list(executor.map(_read_one, file_paths))
+
+# Returns (path, sha256, content) per source file. Files whose mtime and size
+# match the fingerprint index are not read and have content None, until
+# load_contents() fills them in for a prompt.
 def read_codebase(codebase_path, excluded_paths):
-    code_files = []
+    max_file_bytes = get_settings().max_file_bytes
+    files = []
     excluded_paths = [path.strip() for path in excluded_paths if path.strip()]
-    excluded_dirs = [codebase_path_obj / Path(excluded_path) for excluded_path in excluded_paths]
+    codebase_root = str(codebase_path)
+    # normcase makes matching case-insensitive on Windows, as Path comparison was.
+    excluded_dirs = {
+        os.path.normcase(os.path.normpath(os.path.join(codebase_root, excluded_path)))
+        for excluded_path in excluded_paths
+    }
 
-    for root, _, filenames in os.walk(codebase_path):
-        root_path = Path(root).resolve()
+    stack = [codebase_root] if os.path.normcase(codebase_root) not in excluded_dirs else []
+    while stack:
+        root = stack.pop()
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.normcase(entry.path) not in excluded_dirs:
+                            stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in SOURCE_EXTS and entry.is_file():
+                        try:
+                            stat = entry.stat()
+                        except OSError as e:
+                            print(f"Warning: Could not stat file {entry.path}: {e}", file=sys.stderr)
+                            continue
+                        if stat.st_size > max_file_bytes:
+                            print(f"Warning: Skipping file {entry.path} larger than {max_file_bytes} bytes", file=sys.stderr)
+                            continue
+                        files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+        except OSError as e:
+            print(f"Warning: Could not scan directory {root}: {e}", file=sys.stderr)
 
-        if any(excluded_dir in root_path.parents or excluded_dir == root_path for excluded_dir in excluded_dirs):
+    index_path = _file_index_path(codebase_root)
+    old_index = _load_file_index(index_path)
+    new_index = {}
+    code_files = []
+    misses = []
+    for file_path, mtime_ns, size in files:
+        cached = old_index.get(file_path)
+        if cached is not None and cached[:2] == [mtime_ns, size]:
+            new_index[file_path] = cached
+            code_files.append((file_path, cached[2], None))
+        else:
+            misses.append(len(code_files))
+            code_files.append((file_path, None, None))
+
+    for i, content in zip(misses, _read_many([code_files[i][0] for i in misses])):
+        if content is None:
             continue
+        file_path, mtime_ns, size = files[i]
+        digest = hashlib.sha256(content).hexdigest()
+        new_index[file_path] = [mtime_ns, size, digest]
+        code_files[i] = (file_path, digest, content)
+
+    # Rewriting the whole index drops files that were deleted or excluded,
+    # and os.replace keeps concurrent runs from seeing a partial file.
+    if new_index != old_index:
+        try:
+            _write_atomic(index_path, json.dumps(new_index))
+        except Exception as e:
+            print(f"Warning: Could not write file index {index_path}: {e}", file=sys.stderr)
+    elif old_index:
+        # Keep an index that is still in use from being pruned by age.
+        try:
+            os.utime(index_path)
+        except OSError:
+            pass
+
+    return [code_file for code_file in code_files if code_file[1] is not None]
+
+# Files read here are hashed again, and files that cannot be read are dropped,
+# so cache keys built from the result describe exactly what the prompt holds.
+# Contents are decoded to str once per file, since the SDK only accepts str.
+def load_contents(code_files):
+    missing = [i for i, (_, _, content) in enumerate(code_files) if content is None]
+    loaded = list(code_files)
+    for i, content in zip(missing, _read_many([code_files[i][0] for i in missing])):
+        if content is not None:
+            loaded[i] = (code_files[i][0], hashlib.sha256(content).hexdigest(), content)
+    return [
+        (file_path, digest, content.decode("utf-8", errors="replace"))
+        for file_path, digest, content in loaded
+        if content is not None
+    ]
+
+def format_code_for_api(code_files, question=None):
+    if question is None:
+        return "\n".join(code_files)
+    return "\n".join([*code_files, "", question])
+
+def _context_hasher(code_files):
+    hasher = hashlib.sha256(GEMINI_MODEL.encode("utf-8") + b"\0")
+    for _, digest, _ in code_files:
+        hasher.update(bytes.fromhex(digest))
+    return hasher
 
-        for filename in filenames:
-            file_path = root_path / filename
+def _response_cache_key(context_hasher, question):
+    hasher = context_hasher.copy()
+    hasher.update(b"\0" + question.encode("utf-8"))
+    return hasher.hexdigest()
+
+def _write_atomic(path, text):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+def load_cached_response(key):
+    max_age = get_settings().response_cache_max_age
+    if not max_age:
+        return None
+
+    cache_path = CACHE_DIR / f"{key}.txt"
+    try:
+        with cache_path.open("r", encoding="utf-8") as f:
+            if time.time() - os.fstat(f.fileno()).st_mtime > max_age:
+                return None
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Warning: Could not read cached response {cache_path}: {e}", file=sys.stderr)
+        return None
+
+def store_cached_response(key, response_text):
+    if not get_settings().response_cache_max_age:
+        return
+
+    cache_path = CACHE_DIR / f"{key}.txt"
+    try:
+        _write_atomic(cache_path, response_text)
+    except Exception as e:
+        print(f"Warning: Could not write cached response {cache_path}: {e}", file=sys.stderr)
+
+# Responses and file indexes older than RESPONSE_CACHE_MAX_AGE are removed so
+# the cache directory does not grow without bound.
+def prune_cache():
+    max_age = get_settings().response_cache_max_age
+    if not max_age:
+        return
+
+    cutoff = time.time() - max_age
+    for pattern in ("*.txt", "files/*.json"):
+        for path in CACHE_DIR.glob(pattern):
             try:
-                with file_path.open("r", encoding="utf-8") as f:
-                    content = f.read()
-                    code_files.append(content)
-            except Exception as e:
-                print(f"Warning: Could not read file {file_path}: {e}", file=sys.stderr)
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
 
-    return code_files
+def _load_context_index():
+    index_path = CACHE_DIR / "context.json"
+    try:
+        with index_path.open("r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        index = {}
+    except Exception as e:
+        print(f"Warning: Could not read context cache index {index_path}: {e}", file=sys.stderr)
+        index = {}
+    if not isinstance(index, dict):
+        print(f"Warning: Ignoring malformed context cache index {index_path}", file=sys.stderr)
+        index = {}
 
-def format_code_for_api(code_files):
-    return "\n".join(code_files)
+    contexts = index.get("contexts")
+    unsupported_models = index.get("unsupported_models")
+    contexts = {
+        key: entry
+        for key, entry in (contexts.items() if isinstance(contexts, dict) else ())
+        if isinstance(entry, dict)
+        and isinstance(entry.get("name"), str)
+        and isinstance(entry.get("expire_time"), (int, float))
+    }
+    unsupported_models = {
+        model: retry
+        for model, retry in (unsupported_models.items() if isinstance(unsupported_models, dict) else ())
+        if isinstance(retry, (int, float))
+    }
+    return contexts, unsupported_models
 
-def query_gemini(codebase_path, question, excluded_paths):
-    code_files = read_codebase(codebase_path, excluded_paths)
-    if not code_files:
-        print("Error: No code files found to read.", file=sys.stderr)
+def _store_context_index(contexts, unsupported_models):
+    index_path = CACHE_DIR / "context.json"
+    try:
+        _write_atomic(index_path, json.dumps({"contexts": contexts, "unsupported_models": unsupported_models}))
+    except Exception as e:
+        print(f"Warning: Could not write context cache index {index_path}: {e}", file=sys.stderr)
+
+def get_cached_context(code_files, context_key, codebase_root):
+    settings = get_settings()
+    if not settings.context_cache:
+        return None
+    if sum(len(content) for content in code_files) < settings.context_cache_min_bytes:
+        return None
+
+    now = time.time()
+    contexts, unsupported_models = _load_context_index()
+    if unsupported_models.get(GEMINI_MODEL, 0) > now:
+        return None
+
+    genai = _genai()
+    entry = contexts.get(context_key)
+    if entry is not None and entry["expire_time"] > now + 60:
+        try:
+            return genai.caching.CachedContent.get(entry["name"])
+        except Exception as e:
+            print(f"Warning: Cached codebase context {entry['name']} is no longer available: {e}", file=sys.stderr)
+
+    try:
+        cached_content = genai.caching.CachedContent.create(
+            model=GEMINI_MODEL,
+            contents=[format_code_for_api(code_files)],
+            ttl=CONTEXT_CACHE_TTL,
+        )
+    except Exception as e:
+        # Remember the failure so later runs go straight to sending the
+        # codebase inline instead of uploading it twice.
+        print(f"Warning: Could not cache codebase context, sending it inline: {e}", file=sys.stderr)
+        unsupported_models[GEMINI_MODEL] = now + CONTEXT_CACHE_RETRY_AFTER.total_seconds()
+        _store_context_index(contexts, unsupported_models)
         return None
 
-    context = format_code_for_api(code_files)
-    prompt = f"{context}\n\n{question}"
+    # A cache is billed until it expires, so delete the ones this codebase no
+    # longer uses now that its contents have changed.
+    live_contexts = {}
+    for key, value in contexts.items():
+        if value["expire_time"] <= now:
+            continue
+        if value.get("codebase") == codebase_root and value.get("model") == GEMINI_MODEL:
+            try:
+                genai.caching.CachedContent.get(value["name"]).delete()
+            except Exception as e:
+                print(f"Warning: Could not delete stale codebase context {value['name']}: {e}", file=sys.stderr)
+            continue
+        live_contexts[key] = value
+    live_contexts[context_key] = {
+        "name": cached_content.name,
+        "expire_time": cached_content.expire_time.timestamp(),
+        "codebase": codebase_root,
+        "model": GEMINI_MODEL,
+    }
+    unsupported_models = {model: retry for model, retry in unsupported_models.items() if retry > now}
+    _store_context_index(live_contexts, unsupported_models)
+
+    return cached_content
+
+def _create_model(cached_content=None):
+    genai = _genai()
+    if cached_content is not None:
+        try:
+            model = genai.GenerativeModel.from_cached_content(cached_content)
+            print(f"Connected to Gemini model '{GEMINI_MODEL}' with cached codebase context.")
+            return model
+        except Exception as e:
+            print(f"Warning: Could not use cached codebase context, sending it inline: {e}", file=sys.stderr)
 
     try:
         model = genai.GenerativeModel(GEMINI_MODEL)
@@ -65,38 +409,152 @@ def query_gemini(codebase_path, question, excluded_paths):
     except Exception as e:
         print(f"Error initializing GenerativeModel: {e}", file=sys.stderr)
         return None
+    return model
 
-    try:
-        response = model.generate_content(prompt)
-    except Exception as e:
-        print(f"Error during content generation: {e}", file=sys.stderr)
-        return None
+def _prompt_for(model, code_files, question):
+    if model.cached_content is not None:
+        return question
+    return format_code_for_api(code_files, question)
 
+def _response_text(response):
     if not response.candidates:
         print("Error: No candidates returned in the response.", file=sys.stderr)
         return None
 
-    raw_content = response.text
+    # response.text raises ValueError when the candidate has no parts, e.g.
+    # when it was blocked by a safety filter.
+    try:
+        raw_content = response.text
+    except Exception as e:
+        print(f"Error: Could not read text from the response: {e}", file=sys.stderr)
+        return None
     if raw_content is None:
         print("Error: No text content found in the response.", file=sys.stderr)
         return None
 
     return raw_content
 
-def get_query_from_editor():
-    temp_file = "temp_query.txt"
+def query_gemini(codebase_path, question, excluded_paths, refresh=False):
+    code_files = read_codebase(codebase_path, excluded_paths)
+    if not code_files:
+        print("Error: No code files found to read.", file=sys.stderr)
+        return None
+
+    context_hasher = _context_hasher(code_files)
+    response_key = _response_cache_key(context_hasher, question)
+    cached_response = None if refresh else load_cached_response(response_key)
+    if cached_response is not None:
+        print("Using cached Gemini response.")
+        return cached_response
+
+    code_files = load_contents(code_files)
+    if not code_files:
+        print("Error: No code files found to read.", file=sys.stderr)
+        return None
+    context_hasher = _context_hasher(code_files)
+    response_key = _response_cache_key(context_hasher, question)
+    contents = [content for _, _, content in code_files]
+    del code_files
+
+    model = _create_model(get_cached_context(contents, context_hasher.hexdigest(), str(codebase_path)))
+    if model is None:
+        return None
+
+    prompt = _prompt_for(model, contents, question)
+    del contents
+
     try:
-        with open(temp_file, "w", encoding="utf-8") as f:
-            f.write("")
+        response = model.generate_content(prompt)
+    except Exception as e:
+        print(f"Error during content generation: {e}", file=sys.stderr)
+        return None
 
-        if sys.platform.startswith('darwin'):
-            os.system(f"open {temp_file}")
-        elif sys.platform.startswith('win'):
-            os.system(f"start {temp_file}")
-        else:
-            os.system(f"xdg-open {temp_file}")
+    raw_content = _response_text(response)
+    if raw_content is None:
+        return None
+
+    store_cached_response(response_key, raw_content)
+    return raw_content
 
-        input("Press Enter when you have finished editing the query...")
+async def query_gemini_batch(codebase_path, questions, excluded_paths, refresh=False):
+    code_files = read_codebase(codebase_path, excluded_paths)
+    if not code_files:
+        print("Error: No code files found to read.", file=sys.stderr)
+        return None
+
+    context_hasher = _context_hasher(code_files)
+    response_keys = [_response_cache_key(context_hasher, question) for question in questions]
+    responses = [None if refresh else load_cached_response(key) for key in response_keys]
+    pending = [i for i, response in enumerate(responses) if response is None]
+    if not pending:
+        return responses
+
+    code_files = load_contents(code_files)
+    if not code_files:
+        print("Error: No code files found to read.", file=sys.stderr)
+        return None
+    context_hasher = _context_hasher(code_files)
+    response_keys = [_response_cache_key(context_hasher, question) for question in questions]
+    contents = [content for _, _, content in code_files]
+    del code_files
+
+    model = _create_model(get_cached_context(contents, context_hasher.hexdigest(), str(codebase_path)))
+    if model is None:
+        return None
+
+    # Without context caching every prompt carries the whole codebase, so
+    # prompts are built inside the semaphore to bound the copies held at once
+    # to gemini_concurrency.
+    semaphore = asyncio.Semaphore(get_settings().gemini_concurrency)
+
+    async def ask(i):
+        async with semaphore:
+            question = questions[i]
+            try:
+                response = await model.generate_content_async(_prompt_for(model, contents, question))
+            except Exception as e:
+                print(f"Error during content generation for question '{question}': {e}", file=sys.stderr)
+                return
+
+            raw_content = _response_text(response)
+            if raw_content is not None:
+                store_cached_response(response_keys[i], raw_content)
+                responses[i] = raw_content
+
+    await asyncio.gather(*(ask(i) for i in pending))
+    return responses
+
+def read_questions_file(questions_file):
+    try:
+        with open(questions_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except Exception as e:
+        print(f"Error reading questions file {questions_file}: {e}", file=sys.stderr)
+        return []
+
+def _editor_command(path):
+    editor = os.environ.get("EDITOR")
+    if editor:
+        if sys.platform.startswith('win'):
+            # POSIX splitting would eat the backslashes in Windows paths, and an
+            # unquoted "C:\Program Files\..." path must stay one argument.
+            if os.path.isfile(editor):
+                return [editor, path]
+            return [*(arg.strip('"') for arg in shlex.split(editor, posix=False)), path]
+        return [*shlex.split(editor), path]
+    if sys.platform.startswith('darwin'):
+        return ["open", "-W", "-t", path]
+    if sys.platform.startswith('win'):
+        return ["notepad", path]
+    return ["vi", path]
+
+def get_query_from_editor():
+    temp_file = None
+    try:
+        with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False, encoding="utf-8") as f:
+            temp_file = f.name
+
+        subprocess.run(_editor_command(temp_file), check=True)
 
         with open(temp_file, "r", encoding="utf-8") as f:
             query = f.read().strip()
@@ -104,7 +562,7 @@ def get_query_from_editor():
         print(f"Error during query input: {e}", file=sys.stderr)
         query = ""
     finally:
-        if os.path.exists(temp_file):
+        if temp_file is not None and os.path.exists(temp_file):
             os.remove(temp_file)
 
     return query
@@ -114,8 +572,42 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("-q", "--question", help="The query to ask Gemini.")
     group.add_argument("-e", "--editor", action="store_true", help="Open an editor to write the query.")
+    group.add_argument("-f", "--questions-file", help="A file with one query per line to ask concurrently.")
+    parser.add_argument("-r", "--refresh", action="store_true", help="Ignore cached responses and replace them.")
     args = parser.parse_args()
 
+    try:
+        codebase_path_obj = _validate_env()
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    prune_cache()
+
+    if args.questions_file:
+        questions = read_questions_file(args.questions_file)
+        if not questions:
+            print("Error: No queries provided.", file=sys.stderr)
+            sys.exit(1)
+
+        responses = asyncio.run(query_gemini_batch(codebase_path_obj, questions, EXCLUDED_PATHS, args.refresh))
+        if responses is None:
+            print("Failed to generate responses from Gemini.", file=sys.stderr)
+            sys.exit(1)
+
+        failed = False
+        for question, response in zip(questions, responses):
+            print(f"\nQuestion: {question}\n")
+            if response:
+                print("Gemini Response:\n")
+                print(response)
+            else:
+                print("Failed to generate a response from Gemini.", file=sys.stderr)
+                failed = True
+        if failed:
+            sys.exit(1)
+        return
+
     if args.question:
         question = args.question
     elif args.editor:
@@ -124,7 +616,7 @@ def main():
             print("Error: No query provided.", file=sys.stderr)
             sys.exit(1)
 
-    response = query_gemini(codebase_path_obj, question, EXCLUDED_PATHS)
+    response = query_gemini(codebase_path_obj, question, EXCLUDED_PATHS, args.refresh)
     if response:
         print("\nGemini Response:\n")
         print(response)